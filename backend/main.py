@@ -1,22 +1,45 @@
 import os
+import json
+import zlib
+import asyncio
+import hashlib
 import tempfile
+from functools import lru_cache
 from typing import List, Optional
+import numpy as np
+import redis.asyncio as aioredis
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import chromadb
-from langchain.document_loaders import PyPDFLoader, TextLoader
+import fitz  # PyMuPDF
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.embeddings.openai import OpenAIEmbeddings
-from langchain.vectorstores import Chroma
+from langchain.embeddings import CacheBackedEmbeddings, HuggingFaceEmbeddings
+from langchain.embeddings.base import Embeddings
+from langchain.storage import LocalFileStore
+from langchain.vectorstores import Chroma, FAISS
+from langchain.vectorstores.base import VectorStore
+from langchain.vectorstores.utils import DistanceStrategy
+from langchain.docstore.in_memory import InMemoryDocstore
 from langchain.chains import RetrievalQA
-from langchain.llms import OpenAI
+from langchain.chat_models import ChatOpenAI
+from langchain.callbacks import AsyncIteratorCallbackHandler
 from langchain.schema import Document
 
 # Load environment variables
 load_dotenv()
 
+# Bound Chroma's resident memory: without a cache policy every collection
+# segment ever touched stays loaded, so long-running backends trend
+# toward OOM. LRU eviction unloads cold collections past the limit.
+# Must be set before the Chroma client is constructed
+os.environ.setdefault("CHROMA_SEGMENT_CACHE_POLICY", "LRU")
+os.environ.setdefault("CHROMA_MEMORY_LIMIT_BYTES", str(2 * 1024 ** 3))
+
 # Verify that the API key is configured
 if not os.getenv("OPENAI_API_KEY"):
     raise ValueError("OPENAI_API_KEY is not set in the environment variables")
@@ -36,10 +59,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses above 1 KB
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# How many chunks to embed per batch and how many batches to keep in
+# flight at once. Each batch is a single API round-trip (OpenAI accepts up
+# to 2048 inputs per request); the semaphore caps concurrency so parallel
+# batches stay under the API rate limit.
+EMBED_BATCH_SIZE = 256
+EMBED_CONCURRENCY = 8
+
+# Uploads up to this size are buffered entirely in RAM; larger ones
+# spill to a real temporary file
+SPOOL_MAX_SIZE = 16 * 1024 ** 2
+
+# Built once at import: chunk size and overlap are fixed, so there is no
+# reason to reconstruct the splitter (and re-parse its separators) on
+# every upload. Lengths are measured in tokens via tiktoken's cl100k_base
+# encoding - the one used by text-embedding-3-small - so chunks line up
+# with the embedding model's limits instead of approximating by characters
+TEXT_SPLITTER = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+    encoding_name="cl100k_base",
+    chunk_size=1000,
+    chunk_overlap=200,
+)
+
+# Prefix for the per-document Chroma collections. Each document set gets
+# its own collection (suffixed with a content-derived hash) so the LRU
+# segment cache has granular units to evict
+COLLECTION_PREFIX = "docuchat"
+
+# Where the FAISS index is persisted when VECTOR_BACKEND=faiss
+FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "./faiss_index")
+
+# How long cached question/answer pairs stay valid, in seconds
+QA_CACHE_TTL = 3600
+
 # Global variables for system state
-vector_store: Optional[Chroma] = None
+chroma_client: Optional[chromadb.api.ClientAPI] = None
+redis_client: Optional[aioredis.Redis] = None
+vector_store: Optional[VectorStore] = None
 qa_chain: Optional[RetrievalQA] = None
 current_document_name: Optional[str] = None
+current_collection_name: Optional[str] = None
+chunk_count: Optional[int] = None
 
 # Pydantic models for requests and responses
 class QuestionRequest(BaseModel):
@@ -59,63 +122,265 @@ class SystemStatusResponse(BaseModel):
     document_name: Optional[str] = None
     chunks_count: Optional[int] = None
 
-def get_file_loader(file_path: str, file_extension: str):
-    """Gets the appropriate loader based on the file extension"""
-    if file_extension.lower() == '.pdf':
-        return PyPDFLoader(file_path)
-    elif file_extension.lower() == '.txt':
-        return TextLoader(file_path, encoding='utf-8')
-    else:
-        raise ValueError(f"Unsupported file format: {file_extension}")
+def get_vector_backend() -> str:
+    """Returns the configured vector store backend ("chroma" or "faiss")"""
+    return os.getenv("VECTOR_BACKEND", "chroma").lower()
 
-def process_document(file_path: str, file_extension: str) -> int:
-    """Processes a document and returns the number of chunks created"""
-    global vector_store, qa_chain, current_document_name
-    
-    # Upload the document
-    loader = get_file_loader(file_path, file_extension)
-    documents = loader.load()
-    
-    # Split into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-    )
-    chunks = text_splitter.split_documents(documents)
-    
-    # Create embeddings and store in ChromaDB
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-small",
-        openai_api_key=os.getenv("OPENAI_API_KEY")
-    )
-    
-    # Create or update the vector database
-    vector_store = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=os.getenv("CHROMA_DB_PATH", "./chroma_db")
-    )
-    
-    # Create the QA chain
-    llm = OpenAI(
+@lru_cache(maxsize=1)
+def get_llm() -> ChatOpenAI:
+    """Returns the shared chat model client.
+
+    Memoized because each ChatOpenAI carries its own httpx connection
+    pool; reusing one instance keeps warmed TCP/TLS connections across
+    uploads and questions.
+    """
+    return ChatOpenAI(
         model="gpt-4o-mini",
         temperature=0,
+        streaming=True,
         openai_api_key=os.getenv("OPENAI_API_KEY")
     )
-    
-    qa_chain = RetrievalQA.from_chain_type(
-        llm=llm,
+
+def build_qa_chain(store: VectorStore) -> RetrievalQA:
+    """Creates the retrieval QA chain over the given vector store"""
+    return RetrievalQA.from_chain_type(
+        llm=get_llm(),
         chain_type="stuff",
-        retriever=vector_store.as_retriever(search_kwargs={"k": 3}),
+        retriever=store.as_retriever(search_kwargs={"k": 3}),
         return_source_documents=True
     )
-    
-    # Update the current document name
-    current_document_name = os.path.basename(file_path)
-    
+
+@lru_cache(maxsize=1)
+def get_embeddings():
+    """Returns the embedding model selected via EMBEDDING_BACKEND.
+
+    Memoized for the same reason as get_llm: the OpenAI backend owns an
+    httpx connection pool (and the ONNX backend a loaded model) that
+    should be built once, not on every upload.
+
+    "openai" (default) uses the hosted text-embedding-3-small model.
+    "onnx" runs all-MiniLM-L6-v2 locally through onnxruntime: 384-dim
+    vectors (4x smaller than OpenAI's 1536) with no network round-trip
+    or per-token cost. Embeddings are normalized so both backends work
+    with cosine/inner-product retrieval.
+
+    Document embeddings are cached on disk keyed by content hash, so
+    re-uploading a document (or one sharing chunks with a previous one)
+    skips the embedding call for every unchanged chunk.
+    """
+    backend = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+    if backend == "onnx":
+        model_name = "sentence-transformers/all-MiniLM-L6-v2"
+        base = HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={"backend": "onnx"},
+            encode_kwargs={"normalize_embeddings": True},
+        )
+    else:
+        model_name = "text-embedding-3-small"
+        base = OpenAIEmbeddings(
+            model=model_name,
+            openai_api_key=os.getenv("OPENAI_API_KEY")
+        )
+    # The namespace includes the model name so caches of different
+    # models (and dimensions) never mix
+    store = LocalFileStore(os.getenv("EMBEDDING_CACHE_PATH", "./emb_cache"))
+    return CacheBackedEmbeddings.from_bytes_store(base, store, namespace=model_name)
+
+def load_documents(buffer, file_extension: str, source: str):
+    """Yields Documents from an in-memory buffer, one page per PDF page"""
+    if file_extension.lower() == '.pdf':
+        # PyMuPDF parses in C, several times faster than pypdf, reads
+        # straight from the buffer without a disk round-trip, and lets
+        # us yield pages instead of materializing the whole document
+        doc = fitz.open(stream=buffer.read(), filetype="pdf")
+        try:
+            for i, page in enumerate(doc):
+                yield Document(
+                    page_content=page.get_text("text"),
+                    metadata={"source": source, "page": i}
+                )
+        finally:
+            doc.close()
+    elif file_extension.lower() == '.txt':
+        yield Document(
+            page_content=buffer.read().decode('utf-8'),
+            metadata={"source": source}
+        )
+    else:
+        raise ValueError(f"Unsupported file format: {file_extension}")
+
+def split_document(buffer, file_extension: str, source: str) -> List[Document]:
+    """Loads and splits the buffer into chunks, one page at a time"""
+    chunks = []
+    for document in load_documents(buffer, file_extension, source):
+        chunks.extend(TEXT_SPLITTER.split_documents([document]))
+    return chunks
+
+async def embed_chunks(embeddings, chunks: List[Document]) -> List[List[float]]:
+    """Embeds chunks in concurrent batches.
+
+    Batches of EMBED_BATCH_SIZE are dispatched in parallel with at most
+    EMBED_CONCURRENCY in flight, compressing embedding wall time by
+    roughly the concurrency factor while respecting API rate limits.
+    """
+    semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
+
+    async def embed_batch(batch: List[Document]) -> List[List[float]]:
+        async with semaphore:
+            return await embeddings.aembed_documents(
+                [chunk.page_content for chunk in batch]
+            )
+
+    batches = [
+        chunks[i:i + EMBED_BATCH_SIZE]
+        for i in range(0, len(chunks), EMBED_BATCH_SIZE)
+    ]
+    results = await asyncio.gather(*[embed_batch(batch) for batch in batches])
+    return [vector for batch in results for vector in batch]
+
+def build_quantized_faiss(embeddings: Embeddings, texts: List[str],
+                          metadatas: List[dict],
+                          vectors: List[List[float]]) -> FAISS:
+    """Builds a FAISS store over an int8 scalar-quantized index.
+
+    The index stores one signed byte per component instead of a float32,
+    4x less memory, and since the embeddings are unit-norm the extra
+    quantization error costs almost no recall. Queries are quantized by
+    the index itself at search time. Only the FAISS backend can do this;
+    Chroma persists float32 regardless of what it is given.
+    """
+    import faiss
+
+    array = np.asarray(vectors, dtype=np.float32)
+    index = faiss.IndexScalarQuantizer(
+        array.shape[1], faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+    )
+    index.train(array)
+
+    store = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+    )
+    store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+    return store
+
+async def process_document(files: List[tuple], document_name: str) -> int:
+    """Processes uploaded files through one shared pipeline.
+
+    `files` is a list of (buffer, extension, filename) triples; all
+    their chunks go through a single embedding run and vector store, so
+    a batch of uploads pays the pipeline setup cost once instead of per
+    file. Returns the total number of chunks created.
+    """
+    global vector_store, qa_chain, current_document_name, current_collection_name, chunk_count
+
+    # Load and split in a worker thread: parsing is synchronous CPU work
+    chunks = []
+    for buffer, file_extension, filename in files:
+        chunks.extend(
+            await asyncio.to_thread(split_document, buffer, file_extension, filename)
+        )
+
+    # Embed all batches concurrently, then hand the precomputed vectors
+    # to the store so no embedding happens serially at insert time
+    embeddings = get_embeddings()
+    vectors = await embed_chunks(embeddings, chunks)
+
+    texts = [chunk.page_content for chunk in chunks]
+    metadatas = [chunk.metadata for chunk in chunks]
+
+    if get_vector_backend() == "faiss":
+        # In-memory exact inner-product index: no segment files to load
+        # or pickle, sub-millisecond search at single-document scale.
+        # EMBEDDING_QUANTIZATION=int8 swaps in a scalar-quantized index
+        # that stores one byte per component instead of a float32
+        if os.getenv("EMBEDDING_QUANTIZATION", "none").lower() == "int8":
+            vector_store = await asyncio.to_thread(
+                build_quantized_faiss, embeddings, texts, metadatas, vectors
+            )
+        else:
+            vector_store = FAISS.from_embeddings(
+                text_embeddings=list(zip(texts, vectors)),
+                embedding=embeddings,
+                metadatas=metadatas,
+            )
+        await asyncio.to_thread(vector_store.save_local, FAISS_INDEX_PATH)
+    else:
+        # One collection per document set, named after its content, so
+        # the LRU segment cache can evict cold documents independently.
+        # Write the precomputed vectors in bounded batches off the loop
+        name_hash = hashlib.sha256(document_name.encode()).hexdigest()[:16]
+        collection_name = f"{COLLECTION_PREFIX}-{name_hash}"
+
+        # Reap the collection this upload supersedes, otherwise every
+        # replaced document leaves its chunks behind on disk forever
+        if current_collection_name and current_collection_name != collection_name:
+            try:
+                chroma_client.delete_collection(current_collection_name)
+            except Exception as e:
+                print(f"Error deleting previous collection: {e}")
+
+        current_collection_name = collection_name
+        vector_store = Chroma(
+            client=chroma_client,
+            collection_name=current_collection_name,
+            embedding_function=embeddings
+        )
+        collection = vector_store._collection
+        # Deterministic IDs derived from chunk content make re-ingestion
+        # idempotent: upserting a revised document overwrites unchanged
+        # chunks in place instead of appending duplicates under fresh
+        # UUIDs. Identical chunks within one upload collapse to one row
+        rows = {}
+        for text, metadata, vector in zip(texts, metadatas, vectors):
+            chunk_id = hashlib.sha256(text.encode()).hexdigest()
+            rows[chunk_id] = (text, metadata, vector)
+        ids = list(rows)
+        for i in range(0, len(ids), EMBED_BATCH_SIZE):
+            batch_ids = ids[i:i + EMBED_BATCH_SIZE]
+            await asyncio.to_thread(
+                collection.upsert,
+                ids=batch_ids,
+                embeddings=[rows[chunk_id][2] for chunk_id in batch_ids],
+                documents=[rows[chunk_id][0] for chunk_id in batch_ids],
+                metadatas=[rows[chunk_id][1] for chunk_id in batch_ids],
+            )
+
+    # Create the QA chain
+    qa_chain = build_qa_chain(vector_store)
+
+    # Update the current document name and the cached chunk counter
+    current_document_name = document_name
+    chunk_count = len(chunks)
+
     return len(chunks)
 
+@app.on_event("startup")
+async def startup_event():
+    """Create the shared clients and reload any persisted FAISS index"""
+    global chroma_client, redis_client, vector_store, qa_chain, chunk_count
+    chroma_client = chromadb.PersistentClient(
+        path=os.getenv("CHROMA_DB_PATH", "./chroma_db")
+    )
+    # The answer cache is optional: enabled only when REDIS_URL is set
+    if os.getenv("REDIS_URL"):
+        redis_client = aioredis.from_url(os.getenv("REDIS_URL"))
+
+    # With the FAISS backend the index lives in memory, so reload the
+    # persisted copy to survive restarts
+    if get_vector_backend() == "faiss" and os.path.exists(FAISS_INDEX_PATH):
+        vector_store = FAISS.load_local(
+            FAISS_INDEX_PATH,
+            get_embeddings(),
+            allow_dangerous_deserialization=True
+        )
+        qa_chain = build_qa_chain(vector_store)
+        chunk_count = vector_store.index.ntotal
+
 @app.get("/")
 async def root():
     """Root endpoint to verify the API is working"""
@@ -124,73 +389,124 @@ async def root():
 @app.get("/status", response_model=SystemStatusResponse)
 async def get_status():
     """Get the current system status"""
-    global vector_store, current_document_name
-    
+    global vector_store, current_document_name, chunk_count
+
     if vector_store is None:
         return SystemStatusResponse(document_loaded=False)
-    
-    # Get the number of documents in the database
-    collection = vector_store._collection
-    count = collection.count()
-    
+
+    # The chunk counter is maintained at ingestion time, so status never
+    # has to hit the vector store (a count() walks collection metadata
+    # and contends with in-flight inserts)
     return SystemStatusResponse(
         document_loaded=True,
         document_name=current_document_name,
-        chunks_count=count
+        chunks_count=chunk_count
     )
 
 @app.post("/process-document", response_model=DocumentProcessResponse)
-async def process_document_endpoint(file: UploadFile = File(...)):
-    """Process a document uploaded by the user"""
+async def process_document_endpoint(files: List[UploadFile] = File(...)):
+    """Process one or more documents uploaded by the user"""
     global current_document_name
-    
-    # Verify the file type
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="Nombre de archivo no proporcionado")
-    
-    file_extension = os.path.splitext(file.filename)[1]
-    if file_extension.lower() not in ['.pdf', '.txt']:
-        raise HTTPException(
-            status_code=400, 
-            detail="Solo se permiten archivos PDF (.pdf) y texto (.txt)"
+
+    def inner_name(file: UploadFile) -> str:
+        # A trailing .gz marks a gzip-compressed upload of the real file
+        name = file.filename
+        return name[:-3] if name.lower().endswith('.gz') else name
+
+    # Verify every file type before touching any of them
+    for file in files:
+        if not file.filename:
+            raise HTTPException(status_code=400, detail="Nombre de archivo no proporcionado")
+
+        file_extension = os.path.splitext(inner_name(file))[1]
+        if file_extension.lower() not in ['.pdf', '.txt']:
+            raise HTTPException(
+                status_code=400,
+                detail="Solo se permiten archivos PDF (.pdf) y texto (.txt)"
+            )
+
+    async def spool(file: UploadFile) -> tuple:
+        # Stream the upload in chunks into a RAM-backed buffer that only
+        # spills to disk past SPOOL_MAX_SIZE, so small uploads are parsed
+        # straight from memory with no temp-file round-trip;
+        # gzip-compressed uploads are inflated on the fly
+        decompressor = (
+            zlib.decompressobj(wbits=31)
+            if file.filename.lower().endswith('.gz') else None
         )
-    
+        buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+
+        async def write(data: bytes):
+            # In-RAM writes are cheap, but the write that triggers the
+            # rollover and every write after it hit disk - push those to
+            # a worker thread so the event loop never blocks on disk I/O
+            if buffer._rolled or buffer.tell() + len(data) > SPOOL_MAX_SIZE:
+                await asyncio.to_thread(buffer.write, data)
+            else:
+                buffer.write(data)
+
+        while chunk := await file.read(1024 * 1024):
+            if decompressor is not None:
+                chunk = decompressor.decompress(chunk)
+            await write(chunk)
+        if decompressor is not None:
+            await write(decompressor.flush())
+        buffer.seek(0)
+        name = inner_name(file)
+        return buffer, os.path.splitext(name)[1], name
+
+    spooled = []
     try:
-        # Save the temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
-        # Process the document
-        chunks_count = process_document(temp_file_path, file_extension)
-        
-        # Clean up the temporary file
-        os.unlink(temp_file_path)
-        
+        # Spool all uploads concurrently
+        spooled = list(await asyncio.gather(*[spool(file) for file in files]))
+
+        # Process every file through one shared pipeline: parsing and
+        # store writes run in worker threads and embedding batches go out
+        # concurrently, so the event loop stays free for other requests
+        document_name = ", ".join(name for _, _, name in spooled)
+        chunks_count = await process_document(spooled, document_name)
+
         return DocumentProcessResponse(
             message=f"Documento procesado exitosamente. {chunks_count} fragmentos creados.",
-            document_name=file.filename,
+            document_name=document_name,
             chunks_processed=chunks_count
         )
-        
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error procesando documento: {str(e)}")
+    finally:
+        # Release the buffers (and any spilled temp files)
+        for buffer, _, _ in spooled:
+            buffer.close()
 
 @app.post("/ask", response_model=QuestionResponse)
 async def ask_question(request: QuestionRequest):
     """Ask a question about the loaded document"""
-    global qa_chain, vector_store
-    
+    global qa_chain, vector_store, current_document_name
+
     if qa_chain is None or vector_store is None:
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail="No hay ningún documento cargado. Por favor, sube un documento primero."
         )
-    
+
+    # Serve repeated questions from the cache, skipping both the question
+    # embedding and the LLM call
+    cache_key = None
+    if redis_client is not None:
+        question_hash = hashlib.sha256(request.question.encode()).hexdigest()
+        cache_key = f"qa:{question_hash}:{current_document_name}"
+        try:
+            cached = await redis_client.get(cache_key)
+            if cached:
+                return QuestionResponse(**json.loads(cached))
+        except Exception as e:
+            print(f"Error reading QA cache: {e}")
+
     try:
-        # Get the response using the QA chain
-        result = qa_chain({"query": request.question})
+        # Get the response using the QA chain's async path, so the LLM
+        # round-trip does not block the event loop
+        result = await qa_chain.acall({"query": request.question})
         
         # Extract the answer and the sources
         answer = result.get("result", "No se pudo generar una respuesta.")
@@ -203,37 +519,103 @@ async def ask_question(request: QuestionRequest):
                 # Take the first 100 characters as preview
                 preview = doc.page_content[:100] + "..." if len(doc.page_content) > 100 else doc.page_content
                 sources.append(preview)
-        
-        return QuestionResponse(answer=answer, sources=sources)
-        
+
+        response = QuestionResponse(answer=answer, sources=sources)
+
+        if cache_key is not None:
+            try:
+                await redis_client.setex(cache_key, QA_CACHE_TTL, response.json())
+            except Exception as e:
+                print(f"Error writing QA cache: {e}")
+
+        return response
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generando respuesta: {str(e)}")
 
+@app.post("/ask-stream")
+async def ask_question_stream(request: QuestionRequest):
+    """Ask a question and stream the answer tokens as they are generated"""
+    global qa_chain, vector_store
+
+    if qa_chain is None or vector_store is None:
+        raise HTTPException(
+            status_code=400,
+            detail="No hay ningún documento cargado. Por favor, sube un documento primero."
+        )
+
+    callback = AsyncIteratorCallbackHandler()
+
+    async def token_stream():
+        # Run the chain concurrently and forward tokens as the LLM emits
+        # them, so the client sees the first token in hundreds of ms
+        # instead of waiting for the full answer
+        task = asyncio.create_task(
+            qa_chain.acall({"query": request.question}, callbacks=[callback])
+        )
+        # If the chain dies before the LLM starts (retriever or
+        # embed_query failure), the handler never gets on_llm_end and
+        # aiter() would hang forever - unblock it whenever the task ends
+        task.add_done_callback(lambda _: callback.done.set())
+        try:
+            async for token in callback.aiter():
+                yield token
+            await task
+        except Exception as e:
+            yield f"\nError generando respuesta: {str(e)}"
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(token_stream(), media_type="text/plain")
+
 @app.delete("/clear-document")
 async def clear_document():
     """Clean the current document and reset the system"""
-    global vector_store, qa_chain, current_document_name
-    
+    global vector_store, qa_chain, current_document_name, current_collection_name, chunk_count
+
     vector_store = None
     qa_chain = None
     current_document_name = None
-    
-    # Clean the ChromaDB database
+    chunk_count = None
+
+    # Drop the stored index: the persisted FAISS directory, or the Chroma
+    # collection on the shared client (not the whole persist directory,
+    # which would force a full reload on next use)
     try:
-        import shutil
-        chroma_path = os.getenv("CHROMA_DB_PATH", "./chroma_db")
-        if os.path.exists(chroma_path):
-            shutil.rmtree(chroma_path)
+        if get_vector_backend() == "faiss":
+            import shutil
+            if os.path.exists(FAISS_INDEX_PATH):
+                shutil.rmtree(FAISS_INDEX_PATH)
+        elif chroma_client is not None:
+            # Drop every docuchat-* collection, not just the current one,
+            # so collections orphaned by crashes or restarts go too
+            for collection in chroma_client.list_collections():
+                name = getattr(collection, "name", collection)
+                if name.startswith(f"{COLLECTION_PREFIX}-"):
+                    chroma_client.delete_collection(name)
     except Exception as e:
-        print(f"Error cleaning ChromaDB: {e}")
+        print(f"Error cleaning vector store: {e}")
+    finally:
+        current_collection_name = None
     
     return {"message": "Document cleaned successfully"}
 
 if __name__ == "__main__":
     import uvicorn
+    # Auto-reload is opt-in for development; it is incompatible with
+    # multiple workers, so workers are forced to 1 when it is enabled.
+    # WORKERS defaults to 1 because the loaded document (vector_store,
+    # qa_chain, chunk_count) lives in process memory: with N workers an
+    # upload only lands on one of them and the rest keep answering 400.
+    # Raise it only behind a front that shares that state across workers
+    reload = os.getenv("BACKEND_RELOAD", "false").lower() == "true"
     uvicorn.run(
         "main:app",
         host=os.getenv("BACKEND_HOST", "localhost"),
         port=int(os.getenv("BACKEND_PORT", 8000)),
-        reload=True
+        loop="uvloop",
+        http="httptools",
+        workers=1 if reload else int(os.getenv("WORKERS", 1)),
+        reload=reload
     )
@@ -1,5 +1,6 @@
 import streamlit as st
 import requests
+import zlib
 import json
 import os
 from dotenv import load_dotenv
@@ -64,10 +65,19 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Sesión HTTP compartida: reutiliza las conexiones keep-alive entre
+# llamadas (y entre reruns, gracias a cache_resource) en lugar de abrir
+# una conexión TCP nueva por petición
+@st.cache_resource
+def get_session() -> requests.Session:
+    return requests.Session()
+
+SESSION = get_session()
+
 def check_backend_status() -> bool:
     """Verificar si el backend está funcionando"""
     try:
-        response = requests.get(f"{BACKEND_URL}/", timeout=5)
+        response = SESSION.get(f"{BACKEND_URL}/", timeout=5)
         return response.status_code == 200
     except:
         return False
@@ -75,18 +85,40 @@ def check_backend_status() -> bool:
 def get_system_status():
     """Obtener el estado actual del sistema"""
     try:
-        response = requests.get(f"{BACKEND_URL}/status", timeout=5)
+        response = SESSION.get(f"{BACKEND_URL}/status", timeout=5)
         if response.status_code == 200:
             return response.json()
         return None
     except:
         return None
 
+# Cada interacción re-ejecuta todo el script, así que cacheamos las
+# llamadas de estado unos segundos para no golpear el backend en cada rerun
+@st.cache_data(ttl=5, show_spinner=False)
+def check_backend_status_cached() -> bool:
+    return check_backend_status()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def get_system_status_cached():
+    return get_system_status()
+
 def upload_document(file):
     """Subir y procesar un documento"""
     try:
-        files = {"file": (file.name, file.getvalue(), file.type)}
-        response = requests.post(f"{BACKEND_URL}/process-document", files=files, timeout=30)
+        # Comprimir por bloques leyendo del propio objeto fichero (sin
+        # .getvalue(), que duplicaría el original): requests construye el
+        # cuerpo multipart en memoria de todas formas, así que la copia
+        # comprimida es la única asignación extra. wbits=31 produce el
+        # contenedor gzip que el backend espera bajo el sufijo .gz
+        file.seek(0)
+        compressor = zlib.compressobj(wbits=31)
+        parts = []
+        while chunk := file.read(1024 * 1024):
+            parts.append(compressor.compress(chunk))
+        parts.append(compressor.flush())
+        data = b"".join(parts)
+        files = [("files", (file.name + ".gz", data, "application/gzip"))]
+        response = SESSION.post(f"{BACKEND_URL}/process-document", files=files, timeout=30)
         
         if response.status_code == 200:
             return response.json(), None
@@ -99,7 +131,7 @@ def ask_question(question: str):
     """Hacer una pregunta al sistema"""
     try:
         data = {"question": question}
-        response = requests.post(f"{BACKEND_URL}/ask", json=data, timeout=30)
+        response = SESSION.post(f"{BACKEND_URL}/ask", json=data, timeout=30)
         
         if response.status_code == 200:
             return response.json(), None
@@ -111,7 +143,7 @@ def ask_question(question: str):
 def clear_document():
     """Limpiar el documento actual"""
     try:
-        response = requests.delete(f"{BACKEND_URL}/clear-document", timeout=10)
+        response = SESSION.delete(f"{BACKEND_URL}/clear-document", timeout=10)
         if response.status_code == 200:
             return True, None
         else:
@@ -127,12 +159,15 @@ if "chat_history" not in st.session_state:
 st.markdown('<h1 class="main-header">💬 DocuChat</h1>', unsafe_allow_html=True)
 st.markdown('<p class="sub-header">Sistema de Preguntas y Respuestas sobre Documentos Propios</p>', unsafe_allow_html=True)
 
+# Estado consultado una sola vez por rerun y reutilizado en toda la página
+backend_status = check_backend_status_cached()
+system_status = get_system_status_cached() if backend_status else None
+
 # Sidebar para configuración y estado
 with st.sidebar:
     st.header("🔧 Configuración")
-    
+
     # Verificar estado del backend
-    backend_status = check_backend_status()
     if backend_status:
         st.success("✅ Backend conectado")
     else:
@@ -145,7 +180,7 @@ with st.sidebar:
     # Estado del sistema
     st.header("📊 Estado del Sistema")
     if backend_status:
-        status = get_system_status()
+        status = system_status
         if status:
             if status.get("document_loaded"):
                 st.success("📄 Documento cargado")
@@ -158,6 +193,7 @@ with st.sidebar:
                     if success:
                         st.success("Documento limpiado exitosamente")
                         st.session_state.chat_history = []
+                        get_system_status_cached.clear()
                         st.rerun()
                     else:
                         st.error(f"Error: {error}")
@@ -214,6 +250,7 @@ else:
                 if result:
                     st.success(f"✅ {result['message']}")
                     st.session_state.chat_history = []  # Limpiar historial
+                    get_system_status_cached.clear()
                     st.rerun()
                 else:
                     st.error(f"❌ Error: {error}")
@@ -223,8 +260,8 @@ else:
     # Sección de chat
     st.header("💭 Chat con el Documento")
     
-    # Verificar si hay un documento cargado
-    status = get_system_status()
+    # Verificar si hay un documento cargado (mismo estado que el sidebar)
+    status = system_status
     if not status or not status.get("document_loaded"):
         st.warning("⚠️ **No hay ningún documento cargado**")
         st.info("Sube un documento arriba para comenzar a hacer preguntas.")